@@ -1,8 +1,11 @@
 import os
-from dataclasses import dataclass, asdict
+import time
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, Dict, Any, Tuple
 
+from app.utils.file_utils import format_size
+
 @dataclass
 class BackupFile:
     """Модель файла бэкапа для загрузки в S3"""
@@ -11,7 +14,7 @@ class BackupFile:
     relative_path: str
     tag: str
     size: int
-    modification_time: Optional[datetime] = None
+    mtime_epoch: Optional[float] = None  # время модификации, секунды epoch
     name: Optional[str] = None
     
     def __post_init__(self):
@@ -20,23 +23,35 @@ class BackupFile:
             self.name = os.path.basename(self.full_path)
         
         # Устанавливаем время модификации если не задано
-        if self.modification_time is None:
-            self.modification_time = self._get_file_modification_time()
+        if self.mtime_epoch is None:
+            self.mtime_epoch = self._get_file_mtime_epoch()
     
-    def _get_file_modification_time(self) -> datetime:
+    def _get_file_mtime_epoch(self) -> float:
         """Получение времени модификации файла"""
         try:
-            return datetime.fromtimestamp(os.path.getmtime(self.full_path))
+            return os.path.getmtime(self.full_path)
         except Exception:
-            return datetime.now()
+            return time.time()
+    
+    @property
+    def modification_time(self) -> Optional[datetime]:
+        """Время модификации как datetime - строится по запросу из mtime_epoch"""
+        if self.mtime_epoch is None:
+            return None
+        return datetime.fromtimestamp(self.mtime_epoch)
     
     def to_dict(self) -> Dict[str, Any]:
         """Конвертация в словарь"""
-        data = asdict(self)
-        
-        # Конвертируем datetime в строку
-        if self.modification_time:
-            data['modification_time'] = self.modification_time.isoformat()
+        # Словарь собирается явно - asdict копирует каждое поле рекурсивно
+        data = {
+            'full_path': self.full_path,
+            'relative_path': self.relative_path,
+            'tag': self.tag,
+            'size': self.size,
+            'mtime_epoch': self.mtime_epoch,
+            'modification_time': self.modification_time.isoformat() if self.mtime_epoch is not None else None,
+            'name': self.name
+        }
         
         # Добавляем вычисляемые поля
         data['size_formatted'] = self.get_size_formatted()
@@ -46,13 +61,31 @@ class BackupFile:
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'BackupFile':
-        """Создание из словаря"""
-        # Конвертируем строку времени обратно в datetime
-        if 'modification_time' in data and isinstance(data['modification_time'], str):
-            data['modification_time'] = datetime.fromisoformat(data['modification_time'])
+        """Создание из словаря (принимает mtime_epoch или старое поле modification_time)"""
+        data = dict(data)
+        modification_time = data.pop('modification_time', None)
+        
+        # Конвертируем старое ISO/datetime представление в epoch
+        if data.get('mtime_epoch') is None and modification_time is not None:
+            if isinstance(modification_time, str):
+                modification_time = datetime.fromisoformat(modification_time)
+            data['mtime_epoch'] = modification_time.timestamp()
         
         return cls(**data)
     
+    @classmethod
+    def from_scandir_entry(cls, entry: os.DirEntry, relative_path: str, tag: str) -> 'BackupFile':
+        """Создание из os.DirEntry - размер и время модификации из одного stat"""
+        st = entry.stat()
+        return cls(
+            full_path=entry.path,
+            relative_path=relative_path,
+            tag=tag,
+            size=st.st_size,
+            mtime_epoch=st.st_mtime,
+            name=entry.name
+        )
+
     def to_tuple(self) -> Tuple:
         """Конвертация в кортеж для обратной совместимости"""
         return (self.full_path, self.relative_path, self.tag, self.size)
@@ -67,34 +100,32 @@ class BackupFile:
             size=file_tuple[3]
         )
     
+    @classmethod
+    def from_tuple_fast(cls, file_tuple: Tuple) -> 'BackupFile':
+        """
+        Быстрое создание из кортежа без __post_init__ (без обращения к файловой системе).
+        mtime_epoch остается None - при необходимости вызывающий код задает его сам.
+        """
+        obj = object.__new__(cls)
+        obj.full_path, obj.relative_path, obj.tag, obj.size = file_tuple
+        obj.name = os.path.basename(obj.full_path)
+        obj.mtime_epoch = None
+        return obj
+    
     def get_size_formatted(self) -> str:
         """Форматирование размера файла"""
         return self._format_size(self.size)
     
     def get_modification_time_formatted(self) -> str:
         """Форматирование времени модификации"""
-        if self.modification_time:
+        if self.mtime_epoch is not None:
             return self.modification_time.strftime('%Y-%m-%d %H:%M:%S')
         return "Unknown"
     
     @staticmethod
     def _format_size(size_bytes: int) -> str:
         """Форматирование размера в читаемый вид"""
-        if not size_bytes:
-            return "0 B"
-        
-        units = ['B', 'KB', 'MB', 'GB', 'TB']
-        size = float(size_bytes)
-        
-        for unit in units:
-            if size < 1024.0 or unit == units[-1]:
-                if unit == 'B':
-                    return f"{size:.0f} {unit}"
-                else:
-                    return f"{size:.2f} {unit}"
-            size /= 1024.0
-        
-        return f"{size_bytes} B"
+        return format_size(size_bytes)
     
     def exists(self) -> bool:
         """Проверка существования файла"""
@@ -1,4 +1,4 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from typing import Optional, Dict, Any, List
@@ -20,7 +20,6 @@ class Schedule:
     enabled: bool = True
     created_at: Optional[str] = None
     last_run: Optional[str] = None
-    next_run: Optional[str] = None
     description: Optional[str] = None
     categories: Optional[List[str]] = None
     
@@ -39,13 +38,26 @@ class Schedule:
     
     def to_dict(self) -> Dict[str, Any]:
         """Конвертация в словарь для JSON сериализации"""
-        data = asdict(self)
-        data['schedule_type'] = self.schedule_type.value
-        return data
+        return {
+            'id': self.id,
+            'name': self.name,
+            'schedule_type': self.schedule_type.value,
+            'interval': self.interval,
+            'enabled': self.enabled,
+            'created_at': self.created_at,
+            'last_run': self.last_run,
+            'description': self.description,
+            'categories': list(self.categories) if self.categories is not None else None
+        }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Schedule':
         """Создание из словаря"""
+        data = data.copy()
+        # next_run не хранится в модели: его отдает планировщик при формировании ответа API.
+        # Поле удаляется из записей, сохраненных прежними версиями
+        data.pop('next_run', None)
+        
         # Конвертируем строковый тип в Enum
         if isinstance(data.get('schedule_type'), str):
             data['schedule_type'] = ScheduleType(data['schedule_type'])
@@ -62,7 +74,7 @@ class Schedule:
         if not self.interval:
             raise ValueError("Schedule interval is required")
         
-        if self.schedule_type == ScheduleType.INTERVAL:
+        if self.schedule_type is ScheduleType.INTERVAL:
             try:
                 interval_minutes = int(self.interval)
                 if interval_minutes <= 0:
@@ -77,7 +89,7 @@ class Schedule:
     
     def get_interval_display(self) -> str:
         """Получение читаемого представления интервала"""
-        if self.schedule_type == ScheduleType.CRON:
+        if self.schedule_type is ScheduleType.CRON:
             return f"Cron: {self.interval}"
         
         # Для interval расписаний конвертируем минуты в читаемый формат
@@ -1,7 +1,9 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Any, List
 
+from app.utils.file_utils import format_size
+
 @dataclass
 class UploadStats:
     """Модель статистики загрузки"""
@@ -23,7 +25,18 @@ class UploadStats:
     
     def to_dict(self) -> Dict[str, Any]:
         """Конвертация в словарь"""
-        return asdict(self)
+        return {
+            'total_files': self.total_files,
+            'successful': self.successful,
+            'failed': self.failed,
+            'total_bytes': self.total_bytes,
+            'uploaded_bytes': self.uploaded_bytes,
+            'start_time': self.start_time,
+            'file_start_times': dict(self.file_start_times),
+            'is_running': self.is_running,
+            'skipped_existing': self.skipped_existing,
+            'skipped_time': self.skipped_time
+        }
     
     def reset(self):
         """Сброс статистики"""
@@ -87,7 +100,15 @@ class ScheduleStats:
     
     def to_dict(self) -> Dict[str, Any]:
         """Конвертация в словарь"""
-        data = asdict(self)
+        data = {
+            'total_runs': self.total_runs,
+            'successful_runs': self.successful_runs,
+            'failed_runs': self.failed_runs,
+            'total_files_uploaded': self.total_files_uploaded,
+            'total_data_uploaded_bytes': self.total_data_uploaded_bytes,
+            'average_duration': self.average_duration,
+            'last_run': dict(self.last_run)
+        }
         data['success_rate'] = self.get_success_rate()
         data['total_data_uploaded'] = self.get_total_data_formatted()
         return data
@@ -105,18 +126,4 @@ class ScheduleStats:
     @staticmethod
     def _format_size(size_bytes: int) -> str:
         """Форматирование размера в читаемый вид"""
-        if not size_bytes:
-            return "0 B"
-        
-        units = ['B', 'KB', 'MB', 'GB', 'TB']
-        size = float(size_bytes)
-        
-        for unit in units:
-            if size < 1024.0 or unit == units[-1]:
-                if unit == 'B':
-                    return f"{size:.0f} {unit}"
-                else:
-                    return f"{size:.2f} {unit}"
-            size /= 1024.0
-        
-        return f"{size_bytes} B"
\ No newline at end of file
+        return format_size(size_bytes)
\ No newline at end of file
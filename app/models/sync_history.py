@@ -1,9 +1,11 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Optional, Dict, Any
 from uuid import uuid4
 
+from app.utils.file_utils import format_size
+
 class SyncStatus(Enum):
     """Статусы синхронизации"""
     RUNNING = "running"
@@ -28,6 +30,8 @@ class SyncHistory:
     duration: float = 0.0
     error: Optional[str] = None
     end_time: Optional[str] = None
+    # Кэш to_dict - запись меняется только через mark_*, где кэш сбрасывается
+    _cached_dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         # Конвертируем строку в Enum если нужно
@@ -40,16 +44,31 @@ class SyncHistory:
     
     def to_dict(self) -> Dict[str, Any]:
         """Конвертация в словарь для JSON сериализации"""
-        data = asdict(self)
-        data['status'] = self.status.value
-        
-        # Добавляем вычисляемые поля
-        data['success_rate'] = self.get_success_rate()
-        data['duration_formatted'] = self.get_duration_formatted()
-        data['total_size_formatted'] = self.get_size_formatted(self.total_size)
-        data['uploaded_size_formatted'] = self.get_size_formatted(self.uploaded_size)
+        if self._cached_dict is None:
+            self._cached_dict = {
+                'id': self.id,
+                'schedule_id': self.schedule_id,
+                'schedule_name': self.schedule_name,
+                'start_time': self.start_time,
+                'status': self.status.value,
+                'files_processed': self.files_processed,
+                'files_uploaded': self.files_uploaded,
+                'files_failed': self.files_failed,
+                'total_size': self.total_size,
+                'uploaded_size': self.uploaded_size,
+                'duration': self.duration,
+                'error': self.error,
+                'end_time': self.end_time,
+                
+                # Добавляем вычисляемые поля
+                'success_rate': self.get_success_rate(),
+                'duration_formatted': self.get_duration_formatted(),
+                'total_size_formatted': self.get_size_formatted(self.total_size),
+                'uploaded_size_formatted': self.get_size_formatted(self.uploaded_size)
+            }
         
-        return data
+        # Копия, чтобы изменения у вызывающего кода не попадали в кэш
+        return dict(self._cached_dict)
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'SyncHistory':
@@ -87,18 +106,7 @@ class SyncHistory:
     @staticmethod
     def get_size_formatted(size_bytes: int) -> str:
         """Форматирование размера в читаемый вид"""
-        if not size_bytes:
-            return "0 B"
-        
-        units = ['B', 'KB', 'MB', 'GB', 'TB']
-        size = float(size_bytes)
-        
-        for unit in units:
-            if size < 1024.0 or unit == units[-1]:
-                return f"{size:.2f} {unit}"
-            size /= 1024.0
-        
-        return f"{size_bytes} B"
+        return format_size(size_bytes)
     
     def mark_completed(self, files_uploaded: int, files_failed: int, 
                       total_size: int, uploaded_size: int, duration: float):
@@ -111,6 +119,7 @@ class SyncHistory:
         self.uploaded_size = uploaded_size
         self.duration = duration
         self.end_time = datetime.now().isoformat()
+        self._cached_dict = None
     
     def mark_failed(self, error: str, duration: float):
         """Отметка неудачной синхронизации"""
@@ -118,6 +127,7 @@ class SyncHistory:
         self.error = error
         self.duration = duration
         self.end_time = datetime.now().isoformat()
+        self._cached_dict = None
     
     def is_successful(self) -> bool:
         """Проверка успешности синхронизации"""
@@ -2,7 +2,7 @@
 Business logic services for S3 Backup Manager
 """
 
-from app.services.file_scanner import FileScanner, scan_backup_files, get_file_modification_time
+from app.services.file_scanner import FileScanner, scan_backup_files, scan_backup_files_iter, get_file_modification_time
 from app.services.upload_manager import UploadManager, upload_files
 from app.services.s3_client import S3Client, test_connection, get_existing_s3_files, upload_file_to_s3
 from app.services.job_scheduler import JobScheduler
@@ -11,6 +11,7 @@ from app.services.scheduler_service import SchedulerService, scheduler_service
 __all__ = [
     'FileScanner',
     'scan_backup_files',
+    'scan_backup_files_iter',
     'get_file_modification_time',
     'UploadManager',
     'upload_files', 
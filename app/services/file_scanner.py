@@ -1,20 +1,101 @@
 import os
 import logging
 import humanize
-from datetime import datetime
-from typing import List, Set, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from heapq import nlargest
+from itertools import chain
+from operator import itemgetter
+from stat import S_ISREG
+from typing import AbstractSet, Dict, Iterator, List, FrozenSet, Tuple, Optional
 
 from app.utils.config import get_nfs_path, get_ext_tag_map, get_backup_days, get_file_categories, upload_stats
+# Функции file_utils реэкспортируются для обратной совместимости (app.services импортирует их отсюда)
 from app.utils.file_utils import get_file_modification_time, is_file_in_time_range, normalize_s3_key
 
+# Число потоков для параллельного обхода поддиректорий NFS
+SCAN_MAX_WORKERS = 16
+
+@dataclass(frozen=True)
+class _ScanContext:
+    """Неизменяемые параметры одного сканирования, вычисленные до обхода"""
+    
+    nfs_path: str
+    base_prefix: str
+    allowed_ext_tags: Dict[str, str]
+    cutoff_ts: Optional[float]
+    existing_s3_files: AbstractSet[str]
+
+def _filter_entry(entry: os.DirEntry, ctx: _ScanContext):
+    """
+    Фильтрация одного файла - горячий цикл сканирования.
+    Возвращает ((full_path, rel_path, tag, size), mtime), 'skipped_time', 'skipped_existing' или None.
+    Исключения не перехватываются - их логирует вызывающий код.
+    """
+    # Определяем тег по расширению (rfind вместо os.path.splitext; скрытые файлы отсеяны раньше)
+    name = entry.name
+    dot = name.rfind('.')
+    ext = name[dot:].lower() if dot > 0 else ''
+    # Одна проверка словаря решает и "нужное ли расширение", и "входит ли тег в категории"
+    tag = ctx.allowed_ext_tags.get(ext)
+    if tag is None:
+        return None
+    
+    # Один stat на файл - из него берутся тип, время модификации и размер. stat идет по ссылкам,
+    # как os.walk/getsize раньше: файлы за символическими ссылками загружаются. Для обычного файла
+    # DirEntry берет результат из того же lstat, лишнего системного вызова нет
+    try:
+        st = entry.stat()
+    except OSError:
+        # Битая символическая ссылка - загружать нечего; прочие ошибки логирует вызывающий код
+        if entry.is_symlink():
+            return None
+        raise
+    if not S_ISREG(st.st_mode):
+        return None
+    
+    # Проверяем временной диапазон
+    if ctx.cutoff_ts is not None and st.st_mtime < ctx.cutoff_ts:
+        return 'skipped_time'
+    
+    # Получаем относительный путь
+    full_path = entry.path
+    if full_path.startswith(ctx.base_prefix):
+        rel_path = full_path[len(ctx.base_prefix):]
+    else:
+        rel_path = os.path.relpath(full_path, ctx.base_prefix)
+    
+    # Проверяем, существует ли файл уже в S3
+    if rel_path in ctx.existing_s3_files:
+        return 'skipped_existing'
+    
+    return (full_path, rel_path, tag, st.st_size), st.st_mtime
+
+def _build_allowed_ext_tags(ext_tag_map: Dict[str, str], categories_set: Optional[FrozenSet[str]]) -> Dict[str, str]:
+    """
+    Словарь расширение -> тег только для тегов из выбранных категорий.
+    Ключи вида '.ext' в нижнем регистре - одна проверка словаря на файл без повторной нормализации
+    """
+    return {
+        ('.' + ext.lstrip('.')).lower(): tag
+        for ext, tag in ext_tag_map.items()
+        if ext and tag and (not categories_set or tag in categories_set)
+    }
+
 class FileScanner:
     """Сервис для сканирования файлов бэкапов"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
-    def scan_backup_files(self, existing_s3_files: Set[str] = None, categories: Optional[List[str]] = None) -> List[Tuple]:
+    def scan_backup_files(self, existing_s3_files: AbstractSet[str] = None, categories: Optional[List[str]] = None) -> List[Tuple]:
         """Сканирует файлы бэкапов с фильтрацией"""
+        return list(self.scan_backup_files_iter(existing_s3_files, categories))
+    
+    def scan_backup_files_iter(self, existing_s3_files: AbstractSet[str] = None,
+                               categories: Optional[List[str]] = None) -> Iterator[Tuple]:
+        """Сканирует файлы бэкапов с фильтрацией, отдавая кортежи по мере обхода поддиректорий"""
         if existing_s3_files is None:
             existing_s3_files = set()
         
@@ -24,106 +105,173 @@ class FileScanner:
         backup_days = get_backup_days()
         
         # Логируем используемую конфигурацию
-        self.logger.info(f"🔧 FileScanner config - NFS_PATH: {nfs_path}, BACKUP_DAYS: {backup_days}")
+        self.logger.info("🔧 FileScanner config - NFS_PATH: %s, BACKUP_DAYS: %s", nfs_path, backup_days)
         
         if not os.path.exists(nfs_path):
-            self.logger.error(f" NFS path does not exist: {nfs_path}")
-            return []
+            self.logger.error(" NFS path does not exist: %s", nfs_path)
+            return
         
-        self.logger.info(f" Scanning NFS directory: {nfs_path}")
-        self.logger.info(f" Filter: last {backup_days} days")
+        self.logger.info(" Scanning NFS directory: %s", nfs_path)
+        self.logger.info(" Filter: last %s days", backup_days)
         
         selected_categories = categories or get_file_categories()
-        return self._scan_directory(nfs_path, ext_tag_map, backup_days, existing_s3_files, selected_categories)
+        
+        ctx = _ScanContext(
+            nfs_path=nfs_path,
+            # Префикс корня: DirEntry.path всегда начинается с него, относительный путь - срез строки
+            base_prefix=nfs_path if nfs_path.endswith(os.sep) else nfs_path + os.sep,
+            # Категории не меняются во время сканирования - фильтр по ним встроен в словарь расширений
+            allowed_ext_tags=_build_allowed_ext_tags(
+                ext_tag_map,
+                frozenset(selected_categories) if selected_categories else None
+            ),
+            # Граница времени модификации вычисляется один раз на сканирование (None - без фильтра)
+            cutoff_ts=(datetime.now() - timedelta(days=backup_days)).timestamp() if backup_days > 0 else None,
+            existing_s3_files=existing_s3_files
+        )
+        
+        # Ни одно расширение не относится к выбранным категориям - обход NFS ничего не отберет
+        if not ctx.allowed_ext_tags:
+            self.logger.warning(" No file extensions match selected categories: %s", selected_categories)
+            self._update_stats(0, 0, 0, 0)
+            return
+        
+        yield from self._scan_directory(ctx)
     
-    def _scan_directory(self, nfs_path: str, ext_tag_map: dict, backup_days: int, existing_s3_files: Set[str], categories: List[str]) -> List[Tuple]:
-        """Рекурсивное сканирование директории"""
-        backup_files = []
+    def _scan_directory(self, ctx: _ScanContext) -> Iterator[Tuple]:
+        """Рекурсивное сканирование директории (поддиректории верхнего уровня - параллельно)"""
+        files_count = 0
         total_size = 0
         skipped_time = 0
         skipped_existing = 0
+        large_files = []
+        
+        def scan_entries(entries):
+            return self._scan_entries(entries, ctx)
         
         try:
-            for root, dirs, files in os.walk(nfs_path):
-                # Проверка флага остановки
-                if not upload_stats.is_running:
-                    self.logger.info(" Scanning interrupted by user")
-                    break
-                
-                # Игнорируем скрытые директории
-                dirs[:] = [d for d in dirs if not d.startswith('.')]
+            root_files, subdirs = self._list_directory(ctx.nfs_path)
+            
+            # Каждый stat/readdir на NFS - сетевой запрос, GIL на время системного вызова отпускается,
+            # поэтому поддеревья сканируются в пуле потоков. Результаты отдаются в исходном порядке
+            # по мере готовности каждого поддерева
+            workers = max(1, min(SCAN_MAX_WORKERS, len(subdirs)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='file-scan') as executor:
+                results = chain(
+                    [scan_entries(root_files)],
+                    executor.map(lambda path: scan_entries(self._iter_files(path)), subdirs)
+                )
                 
-                for filename in files:
-                    # Проверка флага остановки
-                    if not upload_stats.is_running:
-                        self.logger.info(" Scanning interrupted by user")
-                        break
-                    
-                    # Игнорируем скрытые файлы
-                    if filename.startswith('.'):
-                        continue
+                for files, subtree_skipped_time, subtree_skipped_existing, subtree_large_files in results:
+                    files_count += len(files)
+                    total_size += sum(file_result[3] for file_result in files)  # size is at index 3
+                    skipped_time += subtree_skipped_time
+                    skipped_existing += subtree_skipped_existing
+                    large_files = nlargest(5, chain(large_files, subtree_large_files), key=itemgetter(0))
                     
-                    file_result = self._process_file(
-                        root, filename, ext_tag_map, backup_days,
-                        existing_s3_files, nfs_path, categories
-                    )
+                    # Промежуточная статистика - видна в интерфейсе во время сканирования
+                    self._update_stats(files_count, total_size, skipped_existing, skipped_time)
                     
-                    if file_result:
-                        if file_result == 'skipped_time':
-                            skipped_time += 1
-                        elif file_result == 'skipped_existing':
-                            skipped_existing += 1
-                        else:
-                            backup_files.append(file_result)
-                            total_size += file_result[3]  # size is at index 3
+                    yield from files
+            
+            if not upload_stats.is_running:
+                self.logger.info(" Scanning interrupted by user")
             
             # Обновляем статистику
-            self._update_stats(len(backup_files), total_size, skipped_existing, skipped_time)
+            self._update_stats(files_count, total_size, skipped_existing, skipped_time)
             
             # Логируем результаты
-            self._log_scan_results(backup_files, skipped_time, skipped_existing, total_size)
-            
-            return backup_files
+            self._log_scan_results(files_count, large_files, skipped_time, skipped_existing, total_size)
             
         except Exception as e:
-            self.logger.error(f" Error scanning NFS directory: {e}")
-            return []
+            self.logger.error(" Error scanning NFS directory: %s", e)
     
-    def _process_file(self, root: str, filename: str, ext_tag_map: dict,
-                     backup_days: int, existing_s3_files: Set[str], nfs_path: str,
-                     categories: List[str]):
-        """Обработка отдельного файла"""
-        try:
-            full_path = os.path.join(root, filename)
-            
-            # Определяем тег по расширению
-            ext = os.path.splitext(filename)[1].lower()
-            tag = ext_tag_map.get(ext)
-            if not tag:
-                return None
-
-            if categories and tag not in categories:
-                return None
-            
-            # Проверяем временной диапазон
-            if not is_file_in_time_range(full_path, backup_days):
-                return 'skipped_time'
-            
-            # Получаем относительный путь
-            rel_path = os.path.relpath(full_path, nfs_path)
-            
-            # Проверяем, существует ли файл уже в S3
-            if rel_path in existing_s3_files:
-                return 'skipped_existing'
+    def _scan_entries(self, entries, ctx: _ScanContext) -> Tuple[List[Tuple], int, int, List[Tuple]]:
+        """
+        Фильтрация файлов одного поддерева:
+        (файлы к загрузке, skipped_time, skipped_existing, 5 крупнейших как (size, mtime, файл))
+        """
+        backup_files = []
+        mtimes = []
+        skipped_time = 0
+        skipped_existing = 0
+        
+        # Локальные имена вместо поиска глобальных имен и атрибутов на каждой итерации
+        filter_entry = _filter_entry
+        append_file = backup_files.append
+        append_mtime = mtimes.append
+        stats = upload_stats
+        
+        for entry in entries:
+            # Проверка флага остановки
+            if not stats.is_running:
+                break
             
-            # Получаем размер файла
-            file_size = os.path.getsize(full_path)
+            try:
+                file_result = filter_entry(entry, ctx)
+            except Exception as e:
+                self.logger.warning(" Could not process file %s: %s", entry.name, e)
+                continue
             
-            return (full_path, rel_path, tag, file_size)
+            if file_result:
+                if file_result == 'skipped_time':
+                    skipped_time += 1
+                elif file_result == 'skipped_existing':
+                    skipped_existing += 1
+                else:
+                    file_tuple, mtime = file_result
+                    append_file(file_tuple)
+                    append_mtime(mtime)
+        
+        # O(n log 5) вместо полной сортировки - нужны только 5 крупнейших.
+        # mtime берется из уже сделанного stat, повторный stat при логировании не нужен
+        large_files = nlargest(
+            5,
+            ((file_tuple[3], mtime, file_tuple) for file_tuple, mtime in zip(backup_files, mtimes)),
+            key=itemgetter(0)
+        )
+        
+        return backup_files, skipped_time, skipped_existing, large_files
+    
+    def _list_directory(self, scan_path: str) -> Tuple[List[os.DirEntry], List[str]]:
+        """Чтение одной директории: (файлы, пути поддиректорий) без скрытых элементов"""
+        files = []
+        subdirs = []
+        try:
+            # Читаем директорию целиком, чтобы не держать открытыми дескрипторы при рекурсии
+            with os.scandir(scan_path) as it:
+                entries = list(it)
+        except OSError as e:
+            self.logger.warning(" Could not read directory %s: %s", scan_path, e)
+            return files, subdirs
+        
+        for entry in entries:
+            # Игнорируем скрытые файлы и директории
+            if entry.name.startswith('.'):
+                continue
             
-        except Exception as e:
-            self.logger.warning(f" Could not process file {filename}: {e}")
-            return None
+            # Остальные элементы, включая символические ссылки на файлы, - кандидаты в файлы:
+            # тип проверяется в _filter_entry по тому же stat, что дает размер и mtime
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    files.append(entry)
+            except OSError as e:
+                self.logger.warning(" Could not process entry %s: %s", entry.path, e)
+        
+        return files, subdirs
+    
+    def _iter_files(self, scan_path: str):
+        """Рекурсивный обход директории через os.scandir (без скрытых файлов и директорий)"""
+        # Проверка флага остановки
+        if not upload_stats.is_running:
+            return
+        
+        files, subdirs = self._list_directory(scan_path)
+        yield from files
+        for subdir in subdirs:
+            yield from self._iter_files(subdir)
     
     def _update_stats(self, files_count: int, total_size: int, skipped_existing: int, skipped_time: int):
         """Обновление статистики сканирования"""
@@ -132,20 +280,19 @@ class FileScanner:
         upload_stats.skipped_existing = skipped_existing
         upload_stats.skipped_time = skipped_time
     
-    def _log_scan_results(self, backup_files: List[Tuple], skipped_time: int, 
+    def _log_scan_results(self, files_count: int, large_files: List[Tuple], skipped_time: int,
                          skipped_existing: int, total_size: int):
         """Логирование результатов сканирования"""
-        self.logger.info(f" Scan results: {len(backup_files)} files to upload")
-        self.logger.info(f" Skipped {skipped_time} files (outside time range)")
-        self.logger.info(f" Skipped {skipped_existing} files (already in S3)")
-        self.logger.info(f" Total size to upload: {humanize.naturalsize(total_size)}")
+        self.logger.info(" Scan results: %s files to upload", files_count)
+        self.logger.info(" Skipped %s files (outside time range)", skipped_time)
+        self.logger.info(" Skipped %s files (already in S3)", skipped_existing)
+        self.logger.info(" Total size to upload: %s", humanize.naturalsize(total_size))
         
-        if backup_files:
-            large_files = sorted(backup_files, key=lambda x: x[3], reverse=True)[:5]
+        if large_files:
             self.logger.info(" Top 5 largest files to upload:")
-            for full, rel, tag, size in large_files:
-                file_time = get_file_modification_time(full)
-                self.logger.info(f"  {humanize.naturalsize(size):>10} - {file_time.strftime('%Y-%m-%d %H:%M')} - {rel}")
+            for size, mtime, (full, rel, tag, _) in large_files:
+                file_time = datetime.fromtimestamp(mtime)
+                self.logger.info("  %10s - %s - %s", humanize.naturalsize(size), file_time.strftime('%Y-%m-%d %H:%M'), rel)
 
 # Глобальный экземпляр для обратной совместимости
 file_scanner = FileScanner()
@@ -154,14 +301,5 @@ file_scanner = FileScanner()
 def scan_backup_files(existing_s3_files=None, categories: Optional[List[str]] = None):
     return file_scanner.scan_backup_files(existing_s3_files, categories)
 
-def get_file_modification_time(file_path):
-    from app.utils.file_utils import get_file_modification_time as get_mtime
-    return get_mtime(file_path)
-
-def normalize_s3_key(tag: str, rel_path: str) -> str:
-    from app.utils.file_utils import normalize_s3_key as normalize_key
-    return normalize_key(tag, rel_path)
-
-def is_file_in_time_range(file_path, days_back):
-    from app.utils.file_utils import is_file_in_time_range as in_time_range
-    return in_time_range(file_path, days_back)
\ No newline at end of file
+def scan_backup_files_iter(existing_s3_files=None, categories: Optional[List[str]] = None):
+    return file_scanner.scan_backup_files_iter(existing_s3_files, categories)
@@ -1,9 +1,10 @@
 import logging
 from datetime import datetime
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-from typing import Callable, Any
+from typing import Callable, Any, Dict, Iterable, Optional
 
 from app.models.schedule import Schedule, ScheduleType
 
@@ -51,18 +52,20 @@ class JobScheduler:
         try:
             job_id = schedule.id
             
-            # ИСПРАВЛЕНИЕ: используем value enum для сравнения
-            if schedule.schedule_type.value == 'interval':
-                trigger = IntervalTrigger(minutes=int(schedule.interval))
-                self.logger.debug(f"Scheduling interval job: {schedule.name} every {schedule.interval} minutes")
-            elif schedule.schedule_type.value == 'cron':
+            # Schedule.__post_init__ приводит тип к ScheduleType - сравниваем члены enum по идентичности
+            schedule_type = schedule.schedule_type
+            if schedule_type is ScheduleType.INTERVAL:
+                minutes = int(schedule.interval)
+                trigger = IntervalTrigger(minutes=minutes)
+                self.logger.debug(f"Scheduling interval job: {schedule.name} every {minutes} minutes")
+            elif schedule_type is ScheduleType.CRON:
                 trigger = CronTrigger.from_crontab(schedule.interval)
                 self.logger.debug(f"Scheduling cron job: {schedule.name} with expression '{schedule.interval}'")
             else:
                 self.logger.error(f"Unknown schedule type: {schedule.schedule_type}")
                 return False
                 
-            self.scheduler.add_job(
+            job = self.scheduler.add_job(
                 job_func,
                 trigger=trigger,
                 id=job_id,
@@ -71,10 +74,8 @@ class JobScheduler:
                 replace_existing=True
             )
             
-            # Обновляем следующее время выполнения
-            next_run = self.scheduler.get_job(job_id).next_run_time
-            schedule.next_run = next_run.isoformat() if next_run else None
-            
+            # Время следующего запуска не хранится в расписании: API берет его из планировщика (get_next_run_times)
+            next_run = getattr(job, 'next_run_time', None)
             self.logger.info(f"Scheduled job: {schedule.name}, next run: {next_run}")
             return True
             
@@ -85,13 +86,27 @@ class JobScheduler:
     def unschedule_job(self, job_id: str):
         """Удаление задачи из планировщика"""
         try:
-            if self.scheduler.get_job(job_id):
-                self.scheduler.remove_job(job_id)
-                self.logger.debug(f"Unscheduled job: {job_id}")
+            # remove_job сам сообщает об отсутствии задачи - без предварительного get_job
+            self.scheduler.remove_job(job_id)
+            self.logger.debug(f"Unscheduled job: {job_id}")
+        except JobLookupError:
+            pass
         except Exception as e:
             self.logger.error(f"Error unscheduling job: {e}")
     
     def get_next_run_time(self, job_id: str) -> datetime:
         """Получение времени следующего запуска задачи"""
         job = self.scheduler.get_job(job_id)
-        return job.next_run_time if job else None
\ No newline at end of file
+        return job.next_run_time if job else None
+    
+    def get_next_run_times(self, job_ids: Optional[Iterable[str]] = None) -> Dict[str, Optional[datetime]]:
+        """
+        Время следующего запуска для нескольких задач за одно обращение к хранилищу задач
+        (вместо get_job на каждую задачу). Без job_ids - для всех задач
+        """
+        wanted = set(job_ids) if job_ids is not None else None
+        return {
+            job.id: job.next_run_time
+            for job in self.scheduler.get_jobs()
+            if wanted is None or job.id in wanted
+        }
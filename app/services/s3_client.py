@@ -1,20 +1,116 @@
 import os
 import time
 import logging
+import threading
 import humanize 
 from datetime import datetime
-from typing import Set
+from sys import intern
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import urlsplit
 
+import certifi
+import urllib3
 from minio import Minio
 from minio.error import S3Error
 
+from app import __version__
+
 from app.utils.config import (
-    get_s3_endpoint, get_aws_access_key_id, get_aws_secret_access_key, 
-    get_s3_bucket, get_storage_class, get_enable_tape_storage,
+    get_config_object, get_s3_endpoint, get_s3_bucket,
+    get_storage_class, get_enable_tape_storage,
     get_upload_retries, get_retry_delay, upload_stats
 )
 from app.utils.file_utils import normalize_s3_key
 
+# Число одновременно хранимых клиентов (по одному на набор endpoint/ключей)
+MINIO_CLIENT_CACHE_SIZE = 4
+
+# Размер пула HTTP-соединений клиента MinIO. У SDK по умолчанию 10 - меньше, чем одновременных
+# запросов при MAX_THREADS потоков загрузки, каждый с параллельными частями multipart
+MINIO_POOL_MAXSIZE = int(os.getenv('MINIO_POOL_MAXSIZE', '50'))
+# Таймауты соединения и чтения, секунды (как у SDK по умолчанию)
+MINIO_HTTP_TIMEOUT = 300
+
+# Кэш клиентов по параметрам подключения. Запись - под блокировкой, чтобы потоки загрузки
+# при первом обращении не создали несколько клиентов (и пулов соединений) для одних параметров
+_minio_clients: Dict[Tuple[str, str, str], Minio] = {}
+_minio_clients_lock = threading.Lock()
+
+def _parse_endpoint(endpoint_raw: str) -> Tuple[str, bool]:
+    """
+    Разбор S3_ENDPOINT: (host[:port], secure).
+    Принимает как 'host:port', так и 'http(s)://host:port'. Явная схема определяет TLS;
+    без схемы соединение без TLS, кроме порта 443
+    """
+    if '://' in endpoint_raw:
+        parts = urlsplit(endpoint_raw)
+        return parts.netloc, parts.scheme == 'https'
+    parts = urlsplit(f"//{endpoint_raw}")
+    return parts.netloc, parts.port == 443
+
+def _create_http_client() -> urllib3.PoolManager:
+    """Пул соединений для клиента MinIO: настройки SDK по умолчанию с увеличенным maxsize"""
+    return urllib3.PoolManager(
+        timeout=urllib3.util.Timeout(connect=MINIO_HTTP_TIMEOUT, read=MINIO_HTTP_TIMEOUT),
+        maxsize=MINIO_POOL_MAXSIZE,
+        cert_reqs='CERT_REQUIRED',
+        ca_certs=os.environ.get('SSL_CERT_FILE') or certifi.where(),
+        retries=urllib3.Retry(
+            total=5,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504]
+        )
+    )
+
+def _create_minio_client(endpoint: str, access_key: str, secret_key: str) -> Minio:
+    """Создание клиента MinIO для набора параметров подключения"""
+    logging.getLogger(__name__).info(f" Creating MinIO client - Endpoint: {endpoint}, AccessKey: {access_key[:8]}...")
+    host, secure = _parse_endpoint(endpoint)
+    client = Minio(
+        host,
+        access_key=access_key,
+        secret_key=secret_key,
+        secure=secure,
+        http_client=_create_http_client()
+    )
+    # Приложение видно в User-Agent запросов - проще искать его трафик в логах хранилища
+    client.set_app_info('s3-backup-manager', __version__)
+    return client
+
+def _get_cached_minio_client(endpoint: str, access_key: str, secret_key: str) -> Minio:
+    """
+    Клиент MinIO из кэша: переиспользуется между вызовами вместе с пулом HTTP-соединений,
+    при смене endpoint или ключей создается новый клиент
+    """
+    cache_key = (endpoint, access_key, secret_key)
+    
+    # Быстрый путь без блокировки - клиент уже создан
+    client = _minio_clients.get(cache_key)
+    if client is not None:
+        return client
+    
+    with _minio_clients_lock:
+        # Повторная проверка: клиент мог создать другой поток, пока мы ждали блокировку
+        client = _minio_clients.get(cache_key)
+        if client is None:
+            if len(_minio_clients) >= MINIO_CLIENT_CACHE_SIZE:
+                # Вытесняем самый старый клиент (словарь хранит порядок добавления)
+                del _minio_clients[next(iter(_minio_clients))]
+            client = _create_minio_client(endpoint, access_key, secret_key)
+            _minio_clients[cache_key] = client
+    return client
+
+# Кэш листинга существующих файлов: повторные сканирования в пределах TTL (ручной запуск,
+# расписание, повторная проверка) не перечитывают весь бакет. Сбрасывается после успешной
+# загрузки и при смене конфигурации S3
+EXISTING_FILES_CACHE_TTL = float(os.getenv('S3_EXISTING_FILES_CACHE_TTL', '60'))
+_existing_files_cache: Dict[Tuple[str, str, Optional[Tuple[str, ...]]], Tuple[float, FrozenSet[str]]] = {}
+_existing_files_cache_lock = threading.Lock()
+
+# Время последней успешной проверки соединения по (endpoint, бакет)
+CONNECTION_CHECK_TTL = 10
+_connection_checks: Dict[Tuple[str, str], float] = {}
+
 class S3Client:
     """Клиент для работы с S3-совместимым хранилищем"""
     
@@ -22,31 +118,54 @@ class S3Client:
         self.logger = logging.getLogger(__name__)
     
     def get_minio_client(self) -> Minio:
-        """Создает клиент MinIO - ВСЕГДА АКТУАЛЬНЫЕ КОНФИГИ"""
-        endpoint = get_s3_endpoint()
-        access_key = get_aws_access_key_id()
-        secret_key = get_aws_secret_access_key()
-        bucket = get_s3_bucket()
+        """Возвращает клиент MinIO - ВСЕГДА АКТУАЛЬНЫЕ КОНФИГИ (клиент кэшируется по параметрам подключения)"""
+        return self.get_client_and_bucket()[0]
+    
+    def get_client_and_bucket(self) -> Tuple[Minio, str]:
+        """
+        Клиент MinIO и имя бакета по одному снимку конфигурации
+        (каждый геттер конфигурации - отдельная проверка файла конфигурации)
+        """
+        config = get_config_object()
+        endpoint = config.s3_endpoint
+        access_key = config.s3_access_key
+        secret_key = config.s3_secret_key
+        bucket = config.s3_bucket
         
         # Логируем используемую конфигурацию (без секретного ключа)
-        self.logger.info(f" S3Client config - Endpoint: {endpoint}, Bucket: {bucket}, AccessKey: {access_key[:8]}...")
+        self.logger.debug(f" S3Client config - Endpoint: {endpoint}, Bucket: {bucket}, AccessKey: {access_key[:8]}...")
         
         if not endpoint or not access_key or not secret_key or not bucket:
             self.logger.error(" Missing S3 configuration parameters!")
             raise Exception("S3 configuration is incomplete")
         
-        return Minio(
-            endpoint,
-            access_key=access_key,
-            secret_key=secret_key,
-            secure=False
-        )
+        return _get_cached_minio_client(endpoint, access_key, secret_key), bucket
+    
+    def clear_client_cache(self):
+        """Сброс кэша клиентов MinIO (после изменения конфигурации S3)"""
+        with _minio_clients_lock:
+            _minio_clients.clear()
+        _connection_checks.clear()
+        self.invalidate_existing_files_cache()
+    
+    def invalidate_existing_files_cache(self):
+        """Сброс кэша листинга существующих файлов"""
+        with _existing_files_cache_lock:
+            _existing_files_cache.clear()
     
     def test_connection(self) -> bool:
-        """Тестирование соединения с S3"""
+        """Тестирование соединения с S3 (успешный результат кэшируется на CONNECTION_CHECK_TTL секунд)"""
+        cache_key = None
         try:
             endpoint = get_s3_endpoint()
             bucket = get_s3_bucket()
+            cache_key = (endpoint, bucket)
+            
+            # Health check и запуски загрузки опрашивают соединение часто - недавний успешный
+            # результат возвращается без запроса к хранилищу
+            checked_at = _connection_checks.get(cache_key)
+            if checked_at is not None and time.monotonic() - checked_at < CONNECTION_CHECK_TTL:
+                return True
             
             self.logger.info(f" Testing connection to S3 - Endpoint: {endpoint}, Bucket: {bucket}")
             
@@ -54,68 +173,127 @@ class S3Client:
             
             if not minio_client.bucket_exists(bucket):
                 self.logger.error(f" Bucket {bucket} does not exist")
+                _connection_checks.pop(cache_key, None)
                 return False
             
             self.logger.info(" Bucket access confirmed")
+            _connection_checks[cache_key] = time.monotonic()
             return True
             
         except Exception as e:
             self.logger.error(f" Connection test failed: {e}")
+            if cache_key is not None:
+                _connection_checks.pop(cache_key, None)
             return False
     
-    def get_existing_s3_files(self) -> Set[str]:
-        """Получает список файлов, уже существующих в S3 бакете"""
+    def get_existing_s3_files(self, categories: Optional[List[str]] = None) -> FrozenSet[str]:
+        """
+        Получает список файлов, уже существующих в S3 бакете.
+        Если заданы категории, листинг ограничивается их префиксами (ключ в S3 - '<tag>/<path>'),
+        иначе сканируется весь бакет.
+        """
         existing_files = set()
         try:
             bucket = get_s3_bucket()
+            unique_categories = tuple(dict.fromkeys(categories)) if categories else None
+            cache_key = (get_s3_endpoint(), bucket, unique_categories)
+            
+            with _existing_files_cache_lock:
+                cached = _existing_files_cache.get(cache_key)
+            if cached is not None and time.monotonic() - cached[0] < EXISTING_FILES_CACHE_TTL:
+                self.logger.info(f" Using cached list of {len(cached[1])} existing files in S3 bucket: {bucket}")
+                return cached[1]
+            
             self.logger.info(f" Scanning existing files in S3 bucket: {bucket}")
         
             minio_client = self.get_minio_client()
-            objects = minio_client.list_objects(bucket, recursive=True)
             
+            # Ключи, которые пишет загрузчик, уже нормализованы к [a-zA-Z0-9/._-] (normalize_s3_key) -
+            # URL-кодирование ключей в ответе не нужно, и клиент не декодирует каждый ключ.
+            # Владелец и пользовательские метаданные не запрашиваются (только имена объектов)
+            list_options = {'recursive': True, 'use_url_encoding_type': False}
+            if unique_categories:
+                listings = [
+                    (minio_client.list_objects(bucket, prefix=f"{category}/", **list_options), len(category) + 1)
+                    for category in unique_categories
+                ]
+            else:
+                listings = [(minio_client.list_objects(bucket, **list_options), None)]
+            
+            # Прогресс листинга - только в DEBUG: на миллионах объектов INFO-строка на каждые 100
+            # объектов заметно замедляет цикл и засоряет лог веб-интерфейса
+            log_progress = self.logger.isEnabledFor(logging.DEBUG)
+            add_file = existing_files.add
             count = 0
-            for obj in objects:
-                # Извлекаем оригинальное имя файла из S3 ключа
-                if '/' in obj.object_name:
-                    original_path = '/'.join(obj.object_name.split('/')[1:])
-                    existing_files.add(original_path)
-                    count += 1
+            for objects, prefix_len in listings:
+                for obj in objects:
+                    # Извлекаем оригинальное имя файла из S3 ключа
+                    if prefix_len is not None:
+                        add_file(intern(obj.object_name[prefix_len:]))
+                    else:
+                        # partition вместо split: без списка сегментов и отдельной проверки '/' in
+                        _, sep, rel_path = obj.object_name.partition('/')
+                        if not sep:
+                            continue
+                        add_file(intern(rel_path))
                     
-                    if count % 100 == 0:  # Логируем каждые 100 файлов
-                        self.logger.info(f" Scanned {count} existing files...")
+                    if log_progress:
+                        count += 1
+                        if count % 100 == 0:
+                            self.logger.debug(f" Scanned {count} existing files...")
             
             self.logger.info(f" Found {len(existing_files)} existing files in S3 bucket")
-            return existing_files
+            
+            # Множество только читается при сканировании: frozenset компактнее,
+            # интернированные ключи лежат плотнее в памяти при массовых проверках `in`
+            result = frozenset(existing_files)
+            with _existing_files_cache_lock:
+                _existing_files_cache[cache_key] = (time.monotonic(), result)
+            return result
             
         except Exception as e:
             self.logger.error(f" Error scanning S3 bucket: {e}")
-            return set()
+            return frozenset()
+    
+    @staticmethod
+    def _object_exists(minio_client: Minio, bucket: str, object_name: str) -> bool:
+        """Проверка существования объекта через stat_object (HEAD)"""
+        try:
+            minio_client.stat_object(bucket, object_name)
+            return True
+        except S3Error as e:
+            if e.code in ('NoSuchKey', 'NoSuchObject', 'ResourceNotFound'):
+                return False
+            raise
     
     def upload_file_to_s3(self, full_path: str, relative_path: str, tag: str, 
-                         file_size: int, file_stats: dict) -> bool:
-        """Загружает файл в S3"""
+                         file_size: int, file_stats: dict,
+                         connection: Optional[Tuple[Minio, str]] = None) -> bool:
+        """
+        Загружает файл в S3.
+        connection - (клиент, бакет), полученные один раз на пакет загрузки; без него
+        клиент и бакет определяются по текущей конфигурации
+        """
         if not upload_stats.is_running:
             self.logger.warning(f" Upload stopped, skipping: {os.path.basename(full_path)}")
             return False
             
         safe_key = normalize_s3_key(tag, relative_path)
         
-        if not os.path.exists(full_path):
-            self.logger.error(f" File not found: {full_path}")
-            return False
-        
+        # Отдельный os.path.exists не нужен: файл найден сканированием, а если он исчез,
+        # fput_object поднимет FileNotFoundError при открытии
         file_start_time = time.time()
         filename = os.path.basename(full_path)
         
         try:
-            self.logger.info(f" Starting S3 upload: {filename} -> {safe_key}")
+            self.logger.info(" Starting S3 upload: %s -> %s", filename, safe_key)
             
-            minio_client = self.get_minio_client()
-            bucket = get_s3_bucket()
+            minio_client, bucket = connection or self.get_client_and_bucket()
             
-            # Проверяем существование файла (дополнительная проверка)
-            objects = list(minio_client.list_objects(bucket, prefix=safe_key))
-            if objects:
+            # Проверяем существование файла (дополнительная проверка): основная дедупликация уже
+            # сделана при сканировании по листингу бакета, здесь - HEAD точного ключа вместо LIST
+            # по префиксу (дешевле и не срабатывает на ключи, лишь начинающиеся с safe_key)
+            if self._object_exists(minio_client, bucket, safe_key):
                 self.logger.warning(f" File already exists in S3: {safe_key}")
                 return True
             
@@ -127,13 +305,21 @@ class S3Client:
                 content_type='application/octet-stream'
             )
             
+            # Бакет изменился - закэшированный листинг существующих файлов устарел
+            self.invalidate_existing_files_cache()
+            
             upload_time = time.time() - file_start_time
             speed = file_size / upload_time if upload_time > 0 else 0
             
-            # ИСПРАВЛЕНИЕ: используем импортированный humanize
-            self.logger.info(f" S3 upload successful: {filename} ({humanize.naturalsize(file_size)} in {upload_time:.2f}s, {humanize.naturalsize(speed)}/s)")
+            # Форматирование размеров - только если запись пройдет фильтр уровня (строка на каждый файл)
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(" S3 upload successful: %s (%s in %.2fs, %s/s)",
+                                 filename, humanize.naturalsize(file_size), upload_time, humanize.naturalsize(speed))
             return True
             
+        except FileNotFoundError:
+            self.logger.error(f" File not found: {full_path}")
+            return False
         except S3Error as e:
             self.logger.error(f" S3 error uploading {filename}: {e}")
             return False
@@ -148,8 +334,15 @@ s3_client = S3Client()
 def test_connection():
     return s3_client.test_connection()
 
-def get_existing_s3_files():
-    return s3_client.get_existing_s3_files()
+def clear_client_cache():
+    return s3_client.clear_client_cache()
+
+def get_existing_s3_files(categories: Optional[List[str]] = None):
+    return s3_client.get_existing_s3_files(categories)
+
+def get_client_and_bucket():
+    return s3_client.get_client_and_bucket()
 
-def upload_file_to_s3(full_path: str, relative_path: str, tag: str, file_size: int, file_stats: dict) -> bool:
-    return s3_client.upload_file_to_s3(full_path, relative_path, tag, file_size, file_stats)
\ No newline at end of file
+def upload_file_to_s3(full_path: str, relative_path: str, tag: str, file_size: int, file_stats: dict,
+                      connection=None) -> bool:
+    return s3_client.upload_file_to_s3(full_path, relative_path, tag, file_size, file_stats, connection)
\ No newline at end of file
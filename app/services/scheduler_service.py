@@ -1,11 +1,14 @@
 import time
+import threading
+import traceback
 import humanize
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 from app.models.stats import UploadStats  
 from app.models.schedule import Schedule
-from app.models.sync_history import SyncHistory
+from app.models.sync_history import SyncHistory, SyncStatus
 from app.utils.config import validate_environment, upload_stats, get_config, get_file_categories
 from app.services.file_scanner import scan_backup_files
 from app.services.s3_client import test_connection, get_existing_s3_files
@@ -13,6 +16,7 @@ from app.services.upload_manager import upload_files
 from app.services.job_scheduler import JobScheduler
 from app.utils.debug_logger import DebugLogger
 from app.utils.schedule_storage import ScheduleStorage
+from app.utils.upload_control import upload_control
 
 class SchedulerService:
     """Основной сервис управления расписаниями"""
@@ -97,22 +101,22 @@ class SchedulerService:
             return False
             
         try:
-            old_enabled = self.schedules[schedule_id].enabled
+            schedule = self.schedules[schedule_id]
             
             # Обновляем атрибуты
             for key, value in kwargs.items():
-                if hasattr(self.schedules[schedule_id], key):
-                    setattr(self.schedules[schedule_id], key, value)
+                if hasattr(schedule, key):
+                    setattr(schedule, key, value)
             
             # Валидация обновленного расписания
-            self.schedules[schedule_id].validate()
-            
-            new_enabled = self.schedules[schedule_id].enabled
+            schedule.validate()
             
-            # Перезапускаем задание если оно включено
-            if new_enabled:
-                self.job_scheduler.unschedule_job(schedule_id)
-                self.job_scheduler.schedule_job(self.schedules[schedule_id], self.run_scheduled_sync, (self.schedules[schedule_id],))
+            # Перезапускаем задание если оно включено.
+            # add_job(replace_existing=True) заменяет задание за одну операцию,
+            # снимаем его отдельно только если перепланировать не удалось
+            if schedule.enabled:
+                if not self.job_scheduler.schedule_job(schedule, self.run_scheduled_sync, (schedule,)):
+                    self.job_scheduler.unschedule_job(schedule_id)
             else:
                 self.job_scheduler.unschedule_job(schedule_id)
                 
@@ -188,7 +192,7 @@ class SchedulerService:
             self.debug_logger.info(f" Applying categories filter: {', '.join(selected_categories)}")
 
             self.debug_logger.info(" Getting existing S3 files...")
-            existing_files = get_existing_s3_files()
+            existing_files = get_existing_s3_files(selected_categories)
             self.debug_logger.info(f" Found {len(existing_files)} existing files in S3")
             
             # Шаг 4: Сканирование файлов бэкапа
@@ -225,6 +229,7 @@ class SchedulerService:
                 
                 if upload_stats.is_running:
                     self.debug_logger.warning(" Upload timeout reached, forcing stop")
+                    upload_control.request_stop(finish_current=False)
                     upload_stats.is_running = False
                 
                 # Останавливаем мониторинг статистики
@@ -255,14 +260,11 @@ class SchedulerService:
             
             # Обновляем расписание
             schedule.last_run = datetime.now().isoformat()
-            next_run = self.job_scheduler.get_next_run_time(schedule.id)
-            schedule.next_run = next_run.isoformat() if next_run else None
             self.save_schedules()
-            self.debug_logger.info(" Schedule updated with last_run and next_run")
+            self.debug_logger.info(" Schedule updated with last_run")
             
         except Exception as e:
             self.debug_logger.error(f" Scheduled sync error: {e}")
-            import traceback
             self.debug_logger.error(f" Stack trace: {traceback.format_exc()}")
             
             if history_entry:
@@ -326,7 +328,6 @@ class SchedulerService:
                     self.debug_logger.error(f"Error in stats monitor: {e}")
                     time.sleep(5)
         
-        import threading
         thread = threading.Thread(target=stats_monitor, daemon=True)
         thread.start()
         return thread
@@ -375,22 +376,30 @@ class SchedulerService:
         if not schedule_history:
             return {}
             
-        successful_runs = [h for h in schedule_history if h.status.value == 'completed']
-        failed_runs = [h for h in schedule_history if h.status.value == 'failed']
-        
-        total_files = sum(h.files_uploaded for h in successful_runs if hasattr(h, 'files_uploaded'))
-        total_data = sum(h.uploaded_size for h in successful_runs if hasattr(h, 'uploaded_size'))
-        total_duration = sum(h.duration for h in successful_runs if hasattr(h, 'duration'))
+        # Поля SyncHistory объявлены в dataclass и есть у каждой записи - hasattr на запись не нужен
+        successful_runs = 0
+        failed_runs = 0
+        total_files = 0
+        total_data = 0
+        total_duration = 0
+        for h in schedule_history:
+            if h.status is SyncStatus.COMPLETED:
+                successful_runs += 1
+                total_files += h.files_uploaded
+                total_data += h.uploaded_size
+                total_duration += h.duration
+            elif h.status is SyncStatus.FAILED:
+                failed_runs += 1
         
-        avg_duration = total_duration / len(successful_runs) if successful_runs else 0
+        avg_duration = total_duration / successful_runs if successful_runs else 0
         
         last_run = schedule_history[-1] if schedule_history else None
         
         return {
             'total_runs': len(schedule_history),
-            'successful_runs': len(successful_runs),
-            'failed_runs': len(failed_runs),
-            'success_rate': (len(successful_runs) / len(schedule_history) * 100) if schedule_history else 0,
+            'successful_runs': successful_runs,
+            'failed_runs': failed_runs,
+            'success_rate': (successful_runs / len(schedule_history) * 100) if schedule_history else 0,
             'total_files_uploaded': total_files,
             'total_data_uploaded': humanize.naturalsize(total_data) if total_data > 0 else "0 B",
             'total_data_uploaded_bytes': total_data,
@@ -400,14 +409,23 @@ class SchedulerService:
 
     def get_all_schedules_stats(self) -> dict:
         """Получение статистики для всех расписаний"""
+        # Один проход по истории: счетчик статусов и суммы вместо отдельного прохода на каждую метрику
+        status_counts = Counter()
+        total_files = 0
+        total_data = 0
+        for h in self.sync_history:
+            status_counts[h.status] += 1
+            total_files += h.files_uploaded
+            total_data += h.uploaded_size
+        
         stats = {
             'total_schedules': len(self.schedules),
-            'enabled_schedules': len([s for s in self.schedules.values() if s.enabled]),
+            'enabled_schedules': sum(1 for s in self.schedules.values() if s.enabled),
             'total_runs': len(self.sync_history),
-            'successful_runs': len([h for h in self.sync_history if h.status.value == 'completed']),
-            'failed_runs': len([h for h in self.sync_history if h.status.value == 'failed']),
-            'total_files_uploaded': sum(h.files_uploaded for h in self.sync_history if hasattr(h, 'files_uploaded')),
-            'total_data_uploaded_bytes': sum(h.uploaded_size for h in self.sync_history if hasattr(h, 'uploaded_size')),
+            'successful_runs': status_counts[SyncStatus.COMPLETED],
+            'failed_runs': status_counts[SyncStatus.FAILED],
+            'total_files_uploaded': total_files,
+            'total_data_uploaded_bytes': total_data,
         }
         
         # Вычисляем процент успешных запусков
@@ -483,7 +501,6 @@ class SchedulerService:
             self.debug_logger.info(f" Manually running schedule: {schedule.name}")
             
             # Запускаем в отдельном потоке
-            import threading
             thread = threading.Thread(target=self.run_scheduled_sync, args=(schedule,), daemon=True)
             thread.start()
             
@@ -500,6 +517,15 @@ class SchedulerService:
         """Получение времени следующего запуска"""
         return self.job_scheduler.get_next_run_time(schedule_id)
 
+    def get_next_run_times(self, schedule_ids: Optional[Iterable[str]] = None) -> Dict[str, Optional[datetime]]:
+        """Получение времени следующего запуска для нескольких расписаний одним запросом к планировщику"""
+        return self.job_scheduler.get_next_run_times(schedule_ids)
+
+    @staticmethod
+    def _format_next_run(next_run: Optional[datetime]) -> Optional[str]:
+        """Форматирование времени следующего запуска для API (ISO строка или None)"""
+        return next_run.isoformat() if next_run else None
+
     def is_schedule_enabled(self, schedule_id: str) -> bool:
         """Проверка включено ли расписание"""
         schedule = self.schedules.get(schedule_id)
@@ -546,7 +572,7 @@ class SchedulerService:
             'enabled': schedule.enabled,
             'created_at': schedule.created_at,
             'last_run': schedule.last_run,
-            'next_run': schedule.next_run,
+            'next_run': self._format_next_run(self.get_next_run_time(schedule_id)),
             'description': schedule.description,
             'interval_display': schedule.get_interval_display(),
             'stats': stats
@@ -1,4 +1,5 @@
 import os
+import random
 import time
 import logging
 import humanize
@@ -9,7 +10,7 @@ from app.utils.config import (
     get_max_threads, get_upload_retries, get_retry_delay,
     get_storage_class, get_enable_tape_storage, upload_stats
 )
-from app.services.s3_client import upload_file_to_s3
+from app.services.s3_client import get_client_and_bucket, upload_file_to_s3
 from app.utils.structured_logger import UploadLogger
 from app.utils.upload_control import upload_control
 
@@ -19,6 +20,9 @@ logger = logging.getLogger(__name__)
 # Создаем специализированный логгер для загрузки
 upload_logger = UploadLogger()
 
+# Верхняя граница паузы между попытками, секунды
+RETRY_MAX_DELAY = 300
+
 def upload_files(files_to_upload: List[Tuple]) -> Tuple[int, int]:
     """Основная функция загрузки файлов в S3"""
     
@@ -47,6 +51,13 @@ def upload_files(files_to_upload: List[Tuple]) -> Tuple[int, int]:
         f"max_threads={max_threads}, max_retries={max_retries}, retry_delay={retry_delay}s"
     )
 
+    # Клиент и бакет определяются один раз на пакет, а не на каждый файл и каждую попытку
+    try:
+        connection = get_client_and_bucket()
+    except Exception as e:
+        logger.error(f"Could not resolve S3 connection for upload batch: {e}")
+        connection = None
+
     successful_uploads = 0
     failed_uploads = 0
     last_progress_log = time.time()
@@ -62,7 +73,7 @@ def upload_files(files_to_upload: List[Tuple]) -> Tuple[int, int]:
                 logger.warning("Stop requested: skipping remaining files")
                 break
 
-            future = executor.submit(upload_single_file_with_retry, file_info, max_retries, retry_delay)
+            future = executor.submit(upload_single_file_with_retry, file_info, max_retries, retry_delay, connection)
             future_to_file[future] = file_info
 
         logger.info(f"Submitted {len(future_to_file)} files for upload")
@@ -120,11 +131,21 @@ def upload_files(files_to_upload: List[Tuple]) -> Tuple[int, int]:
 
     return successful_uploads, failed_uploads
 
-def upload_single_file_with_retry(file_info: Tuple, max_retries: int, retry_delay: int) -> bool:
-    """Загрузка одного файла с повторными попытками"""
+def get_retry_backoff(retry_delay: int, attempt: int) -> float:
+    """
+    Экспоненциальная пауза с полным джиттером: случайное значение от 0 до retry_delay * 2^attempt
+    (не больше RETRY_MAX_DELAY). Потоки, упавшие на одной временной ошибке S3, повторяют
+    попытки вразнобой, а не одновременно
+    """
+    return round(random.uniform(0, min(RETRY_MAX_DELAY, retry_delay * 2 ** attempt)), 1)
+
+def upload_single_file_with_retry(file_info: Tuple, max_retries: int, retry_delay: int,
+                                  connection: Optional[Tuple] = None) -> bool:
+    """Загрузка одного файла с повторными попытками (connection - клиент и бакет пакета загрузки)"""
     full_path, relative_path, tag, file_size = file_info
     filename = os.path.basename(full_path)
     file_start_time: Optional[float] = None
+    backoff = 0.0
     
     for attempt in range(max_retries + 1):
         if upload_control.force_stop() or not upload_stats.is_running:
@@ -136,14 +157,14 @@ def upload_single_file_with_retry(file_info: Tuple, max_retries: int, retry_dela
             if attempt == 0:
                 upload_logger.log_file_start(filename, file_size, attempt + 1)
             else:
-                upload_logger.log_file_retry(filename, attempt, retry_delay)
+                upload_logger.log_file_retry(filename, attempt, backoff)
             
-            # Записываем время начала загрузки файла
+            # Время начала попытки хранится локально в потоке загрузки - без общего словаря
+            # upload_stats.file_start_times, который конкурентно меняли все потоки
             file_start_time = time.time()
-            upload_stats.file_start_times[full_path] = file_start_time
             
             # Пытаемся загрузить файл
-            success = upload_file_to_s3(full_path, relative_path, tag, file_size, {})
+            success = upload_file_to_s3(full_path, relative_path, tag, file_size, {}, connection)
             
             if success:
                 # Вычисляем время загрузки
@@ -151,7 +172,6 @@ def upload_single_file_with_retry(file_info: Tuple, max_retries: int, retry_dela
                 
                 # Обновляем статистику
                 upload_stats.uploaded_bytes += file_size
-                upload_stats.file_start_times.pop(full_path, None)
                 
                 # Логируем успех
                 upload_logger.log_file_success(filename, file_size, upload_time, attempt + 1)
@@ -171,11 +191,11 @@ def upload_single_file_with_retry(file_info: Tuple, max_retries: int, retry_dela
         
         # Если это не последняя попытка - ждем перед повторной попыткой
         if attempt < max_retries:
-            for _ in range(retry_delay):
-                if upload_control.force_stop() or not upload_stats.is_running:
-                    upload_logger.log_file_stopped(filename, "Upload process stopped during retry delay")
-                    return False
-                time.sleep(1)
+            # Ожидание прерывается сразу при принудительной остановке, без опроса флагов раз в секунду
+            backoff = get_retry_backoff(retry_delay, attempt)
+            if upload_control.wait_force_stop(backoff) or not upload_stats.is_running:
+                upload_logger.log_file_stopped(filename, "Upload process stopped during retry delay")
+                return False
     
     # Все попытки исчерпаны
     upload_logger.log_file_failure(filename, max_retries + 1, "All retry attempts exhausted")
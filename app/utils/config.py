@@ -14,6 +14,7 @@ upload_stats = UploadStats()
 # Импортируем функции из нового менеджера конфигурации
 from app.utils.config_manager import (
     get_config,
+    get_config_object,
     update_config,
     validate_environment,
     get_nfs_path,
@@ -35,6 +36,7 @@ from app.utils.config_manager import (
 __all__ = [
     'upload_stats',
     'get_config',
+    'get_config_object',
     'update_config',
     'validate_environment',
     'get_nfs_path',
@@ -116,6 +116,7 @@ class ConfigManager:
     def __init__(self, config_file: str = 'data/config.json'):
         self.config_file = Path(config_file)
         self._config: Optional[AppConfig] = None
+        self._config_mtime: Optional[int] = None
     
     def _ensure_config_dir(self) -> None:
         """Создает директорию для конфигурационного файла если не существует"""
@@ -125,6 +126,13 @@ class ConfigManager:
         except Exception as e:
             logger.error(f"Error creating config directory: {e}")
     
+    def _get_file_mtime(self) -> Optional[int]:
+        """Возвращает время изменения конфигурационного файла (None если файла нет)"""
+        try:
+            return self.config_file.stat().st_mtime_ns
+        except OSError:
+            return None
+    
     def _load_from_file(self) -> Dict[str, Any]:
         """Загружает конфигурацию из файла"""
         try:
@@ -169,9 +177,17 @@ class ConfigManager:
         """
         Получение конфигурации с приоритетом: файл > переменные окружения > значения по умолчанию
         
+        Конфигурация кэшируется и пересобирается только после update_config()
+        или при изменении конфигурационного файла (проверяется по mtime).
+        
         Returns:
             Объект конфигурации AppConfig
         """
+        # Кэш действителен, пока файл не изменился - один stat вместо чтения и разбора JSON
+        file_mtime = self._get_file_mtime()
+        if self._config is not None and file_mtime == self._config_mtime:
+            return self._config
+        
         # Загружаем из файла (наивысший приоритет)
         file_config = self._load_from_file()
         
@@ -189,6 +205,7 @@ class ConfigManager:
         merged_config.update(file_config)
         
         self._config = AppConfig.from_dict(merged_config)
+        self._config_mtime = file_mtime
         return self._config
     
     def update_config(self, new_config: Dict[str, Any]) -> None:
@@ -8,10 +8,16 @@ import logging
 from datetime import datetime, timedelta
 from typing import Optional, Tuple
 
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+# Регулярные выражения нормализации ключей компилируются один раз при импорте
+_UNSAFE_KEY_CHARS_RE = re.compile(r'[^a-zA-Z0-9/._-]')
+_REPEATED_UNDERSCORES_RE = re.compile(r'_+')
+
 def normalize_s3_key(tag: str, rel_path: str) -> str:
     """Нормализация имени файла для S3"""
-    safe_path = re.sub(r'[^a-zA-Z0-9/._-]', '_', rel_path)
-    safe_path = re.sub(r'_+', '_', safe_path)
+    safe_path = _UNSAFE_KEY_CHARS_RE.sub('_', rel_path)
+    safe_path = _REPEATED_UNDERSCORES_RE.sub('_', safe_path)
     segments = safe_path.split('/')
     safe_segments = [seg.strip('_').strip('.')[:200] for seg in segments]
     return f"{tag}/" + '/'.join(safe_segments)
@@ -37,14 +43,16 @@ def is_file_in_time_range(file_path: str, days_back: int) -> bool:
 def get_file_info(file_path: str, base_path: str) -> Optional[Tuple]:
     """Получение информации о файле для загрузки"""
     try:
-        if not os.path.exists(file_path):
+        # Один stat вместо exists + getsize + getmtime
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
             return None
-            
-        file_size = os.path.getsize(file_path)
+        
         relative_path = os.path.relpath(file_path, base_path)
-        modification_time = get_file_modification_time(file_path)
+        modification_time = datetime.fromtimestamp(st.st_mtime)
         
-        return (file_path, relative_path, file_size, modification_time)
+        return (file_path, relative_path, st.st_size, modification_time)
         
     except Exception as e:
         logging.warning(f"Could not get file info for {file_path}: {e}")
@@ -55,15 +63,8 @@ def format_size(size_bytes: int) -> str:
     if not size_bytes:
         return "0 B"
     
-    units = ['B', 'KB', 'MB', 'GB', 'TB']
-    size = float(size_bytes)
-    
-    for unit in units:
-        if size < 1024.0 or unit == units[-1]:
-            if unit == 'B':
-                return f"{size:.0f} {unit}"
-            else:
-                return f"{size:.2f} {unit}"
-        size /= 1024.0
-    
-    return f"{size_bytes} B"
\ No newline at end of file
+    # Единица измерения определяется по числу бит, без цикла делений на 1024
+    idx = min((int(size_bytes).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    if idx <= 0:
+        return f"{size_bytes:.0f} B"
+    return f"{size_bytes / (1 << (idx * 10)):.2f} {_SIZE_UNITS[idx]}"
\ No newline at end of file
@@ -1,9 +1,10 @@
 import os
-import json
+import orjson
 import logging
 from typing import Dict, Any, Tuple, List
 from app.models.schedule import Schedule
 from app.models.sync_history import SyncHistory
+from app.utils.file_utils import format_size
 
 class ScheduleStorage:
     """Утилита для работы с хранилищем расписаний"""
@@ -27,8 +28,8 @@ class ScheduleStorage:
         
         try:
             if os.path.exists(self.schedule_file):
-                with open(self.schedule_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(self.schedule_file, 'rb') as f:
+                    data = orjson.loads(f.read())
                     
                     # Загружаем расписания
                     for schedule_id, schedule_data in data.get('schedules', {}).items():
@@ -50,7 +51,7 @@ class ScheduleStorage:
                     
                     self.logger.info(f"Loaded {len(schedules)} schedules and {len(history)} history entries")
                     
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             self.logger.error(f"Invalid JSON in schedule file: {e}")
             # Создаем backup поврежденного файла
             self._backup_corrupted_file()
@@ -96,8 +97,9 @@ class ScheduleStorage:
             
             # Создаем временный файл для атомарной записи
             temp_file = f"{self.schedule_file}.tmp"
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            # orjson пишет UTF-8 без экранирования (как ensure_ascii=False) и в разы быстрее json
+            with open(temp_file, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
             
             # Заменяем старый файл новым
             if os.path.exists(self.schedule_file):
@@ -136,11 +138,13 @@ class ScheduleStorage:
                     'size_human': self._format_size(file_stats.st_size)
                 })
                 
-                # Информация о данных в файле
-                schedules, history = self.load_schedules()
+                # Информация о данных в файле - нужны только количества,
+                # объекты Schedule/SyncHistory не строим
+                with open(self.schedule_file, 'rb') as f:
+                    data = orjson.loads(f.read())
                 info.update({
-                    'schedules_count': len(schedules),
-                    'history_count': len(history)
+                    'schedules_count': len(data.get('schedules', {})),
+                    'history_count': len(data.get('history', []))
                 })
                 
             except Exception as e:
@@ -151,18 +155,4 @@ class ScheduleStorage:
     @staticmethod
     def _format_size(size_bytes: int) -> str:
         """Форматирование размера файла"""
-        if not size_bytes:
-            return "0 B"
-        
-        units = ['B', 'KB', 'MB', 'GB']
-        size = float(size_bytes)
-        
-        for unit in units:
-            if size < 1024.0 or unit == units[-1]:
-                if unit == 'B':
-                    return f"{size:.0f} {unit}"
-                else:
-                    return f"{size:.2f} {unit}"
-            size /= 1024.0
-        
-        return f"{size_bytes} B"
\ No newline at end of file
+        return format_size(size_bytes)
\ No newline at end of file
@@ -9,6 +9,8 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 from pathlib import Path
 
+import humanize
+
 
 class StructuredFormatter(logging.Formatter):
     """Форматтер для структурированного логирования"""
@@ -71,7 +73,6 @@ class UploadLogger:
         self._successful_files = 0
         self._failed_files = 0
         
-        import humanize
         self.logger.info(
             f"🚀 Upload session started: {total_files} files, "
             f"total size: {humanize.naturalsize(total_size)}",
@@ -80,7 +81,10 @@ class UploadLogger:
     
     def log_file_start(self, filename: str, file_size: int, attempt: int = 1) -> None:
         """Логирование начала загрузки файла"""
-        import humanize
+        # Запись на каждый файл: размер форматируется, только если INFO не отфильтрован
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         self.logger.info(
             f"📤 Starting upload: {filename} ({humanize.naturalsize(file_size)}) [attempt {attempt}]",
             extra={
@@ -92,11 +96,14 @@ class UploadLogger:
     
     def log_file_success(self, filename: str, file_size: int, upload_time: float, attempt: int) -> None:
         """Логирование успешной загрузки файла"""
-        import humanize
         speed = file_size / upload_time if upload_time > 0 else 0
         self._processed_files += 1
         self._successful_files += 1
         
+        # Счетчики обновлены выше; строка с размерами и скоростью нужна, только если INFO не отфильтрован
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         progress = (self._processed_files / self._total_files * 100) if self._total_files > 0 else 0
         
         self.logger.info(
@@ -135,7 +142,7 @@ class UploadLogger:
             }
         )
     
-    def log_file_retry(self, filename: str, attempt: int, retry_delay: int) -> None:
+    def log_file_retry(self, filename: str, attempt: int, retry_delay: float) -> None:
         """Логирование повторной попытки"""
         self.logger.warning(
             f"🔄 Retrying upload: {filename} [attempt {attempt + 1}] after {retry_delay}s",
@@ -164,7 +171,6 @@ class UploadLogger:
             speed = uploaded_bytes / elapsed if elapsed > 0 else 0
             progress = (processed / self._total_files * 100) if self._total_files > 0 else 0
             
-            import humanize
             self.logger.info(
                 f"📊 Progress: {processed}/{self._total_files} files "
                 f"({progress:.1f}%) | "
@@ -190,7 +196,6 @@ class UploadLogger:
             elapsed = datetime.now().timestamp() - self._upload_start_time
             speed = uploaded_bytes / elapsed if elapsed > 0 else 0
             
-            import humanize
             success_rate = (successful / (successful + failed) * 100) if (successful + failed) > 0 else 0
             
             self.logger.info(
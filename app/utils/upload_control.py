@@ -11,12 +11,15 @@ class UploadControl:
         self._stop_requested = False
         self._force_stop = False
         self._executor: Optional[ThreadPoolExecutor] = None
+        # Set on force stop so retry delays wake up immediately instead of polling flags
+        self._force_stop_event = threading.Event()
 
     def reset(self) -> None:
         """Reset control flags before a new upload session."""
         with self._lock:
             self._stop_requested = False
             self._force_stop = False
+            self._force_stop_event.clear()
 
     def register_executor(self, executor: ThreadPoolExecutor) -> None:
         """Register the current executor to control force shutdown."""
@@ -40,8 +43,10 @@ class UploadControl:
         with self._lock:
             self._stop_requested = True
             self._force_stop = not finish_current
-            if self._force_stop and self._executor:
-                self._executor.shutdown(wait=False, cancel_futures=True)
+            if self._force_stop:
+                self._force_stop_event.set()
+                if self._executor:
+                    self._executor.shutdown(wait=False, cancel_futures=True)
 
     def stop_requested(self) -> bool:
         with self._lock:
@@ -51,6 +56,14 @@ class UploadControl:
         with self._lock:
             return self._force_stop
 
+    def wait_force_stop(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for a force stop.
+
+        Returns:
+            True if a force stop was requested, False if the timeout elapsed.
+        """
+        return self._force_stop_event.wait(timeout)
+
 
 upload_control = UploadControl()
 
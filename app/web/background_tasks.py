@@ -1,6 +1,7 @@
 import threading
 import time
 import logging
+import traceback
 from datetime import datetime
 import humanize
 
@@ -51,13 +52,14 @@ def run_upload():
             logging.error("Connection test failed. Check credentials and endpoint.")
             return
 
-        # Получаем список существующих файлов в S3
+        # Получаем список существующих файлов в S3 (только по выбранным категориям)
+        categories = get_file_categories()
         logging.info("Scanning existing files in S3 bucket...")
-        existing_files = get_existing_s3_files()
+        existing_files = get_existing_s3_files(categories)
         
         # Сканируем файлы для загрузки
         logging.info("Scanning backup files...")
-        files_to_upload = scan_backup_files(existing_files, get_file_categories())
+        files_to_upload = scan_backup_files(existing_files, categories)
         if not files_to_upload:
             logging.info("No files to upload. Exiting.")
             return
@@ -71,7 +73,6 @@ def run_upload():
         
     except Exception as e:
         logging.error(f"Upload error: {e}")
-        import traceback
         logging.error(traceback.format_exc())
     finally:
         upload_stats.is_running = False
@@ -89,8 +90,9 @@ def scan_files_with_config():
         upload_stats.skipped_existing = 0
         upload_stats.skipped_time = 0
         
-        existing_files = get_existing_s3_files()
-        files = scan_backup_files(existing_files, get_file_categories())
+        categories = get_file_categories()
+        existing_files = get_existing_s3_files(categories)
+        files = scan_backup_files(existing_files, categories)
         
         # Восстанавливаем состояние
         upload_stats.is_running = original_running
@@ -132,14 +134,8 @@ def get_stats_data():
             'detailed_stats': "No active upload" if not upload_stats.is_running else "Initializing..."
         }
         
-    elapsed_time = time.time() - upload_stats.start_time
-    processed_files = upload_stats.successful + upload_stats.failed
-    
-    progress_percent = 0
-    if upload_stats.total_files > 0:
-        progress_percent = (processed_files / upload_stats.total_files) * 100
-    
-    bytes_per_second = upload_stats.uploaded_bytes / elapsed_time if elapsed_time > 0 else 0
+    progress = _get_upload_progress()
+    elapsed_time, _, progress_percent, bytes_per_second = progress
     
     # Форматирование времени
     if elapsed_time > 0:
@@ -164,24 +160,30 @@ def get_stats_data():
         'upload_speed': f"{humanize.naturalsize(bytes_per_second)}/s",
         'elapsed_time': elapsed_str,
         'is_running': upload_stats.is_running,
-        'detailed_stats': get_detailed_stats()
+        'detailed_stats': get_detailed_stats(progress)
     }
 
-def get_detailed_stats():
-    """Получение детальной статистики"""
-    # ИСПРАВЛЕНО: правильное использование атрибутов объекта
-    if upload_stats.start_time == 0.0 or upload_stats.total_files == 0:
-        return "No active upload"
-        
+def _get_upload_progress():
+    """Общие метрики прогресса: (elapsed_time, processed_files, progress_percent, bytes_per_second)"""
     elapsed_time = time.time() - upload_stats.start_time
     processed_files = upload_stats.successful + upload_stats.failed
     
     progress_percent = 0
     if upload_stats.total_files > 0:
         progress_percent = (processed_files / upload_stats.total_files) * 100
-        
+    
     bytes_per_second = upload_stats.uploaded_bytes / elapsed_time if elapsed_time > 0 else 0
     
+    return elapsed_time, processed_files, progress_percent, bytes_per_second
+
+def get_detailed_stats(progress=None):
+    """Получение детальной статистики (progress - уже вычисленные метрики из get_stats_data)"""
+    # ИСПРАВЛЕНО: правильное использование атрибутов объекта
+    if upload_stats.start_time == 0.0 or upload_stats.total_files == 0:
+        return "No active upload"
+    
+    elapsed_time, processed_files, progress_percent, bytes_per_second = progress or _get_upload_progress()
+    
     return f"""
 Overall Progress:
   Files: {processed_files}/{upload_stats.total_files} ({progress_percent:.1f}%)
@@ -190,7 +192,7 @@ Overall Progress:
 
 Upload Speed:
   Current: {humanize.naturalsize(bytes_per_second)}/s
-  Average: {humanize.naturalsize(upload_stats.uploaded_bytes / elapsed_time) if elapsed_time > 0 else '0 B'}/s
+  Average: {humanize.naturalsize(bytes_per_second) if elapsed_time > 0 else '0 B'}/s
 
 Data Transfer:
   Total to upload: {humanize.naturalsize(upload_stats.total_bytes)}
@@ -21,9 +21,8 @@ class WebLogHandler(logging.Handler):
             # Отправляем только важные логи в веб-интерфейс
             if record.levelno >= logging.INFO:
                 # Убираем временные метки для веб-интерфейса
-                clean_message = message
-                if ']' in clean_message:
-                    clean_message = clean_message.split(']', 1)[1].strip()
+                _, sep, tail = message.partition(']')
+                clean_message = tail.strip() if sep else message
                 
                 self.socketio.emit('log_message', {
                     'message': clean_message,
@@ -2,7 +2,7 @@
 Модуль маршрутов веб-приложения
 """
 
-from flask import Flask
+from flask import Flask, jsonify
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -38,12 +38,10 @@ def _register_error_handlers(app: Flask) -> None:
     
     @app.errorhandler(404)
     def not_found(error):
-        from flask import jsonify
         return jsonify({'status': 'error', 'message': 'Endpoint not found'}), 404
     
     @app.errorhandler(500)
     def internal_error(error):
         app.logger.error(f"Internal server error: {error}", exc_info=True)
-        from flask import jsonify
         return jsonify({'status': 'error', 'message': 'Internal server error'}), 500
 
@@ -7,6 +7,7 @@ from flask import Flask, jsonify, request
 from typing import Dict, Any, Tuple
 
 from app.utils.config import get_config, update_config
+from app.services.s3_client import clear_client_cache
 
 
 def init_routes(app: Flask) -> None:
@@ -50,6 +51,8 @@ def init_routes(app: Flask) -> None:
             
             # Обновляем конфигурацию
             update_config(config_data)
+            # Клиенты со старыми параметрами подключения больше не нужны
+            clear_client_cache()
             app.logger.info("Configuration updated successfully")
             
             # Возвращаем обновленную конфигурацию
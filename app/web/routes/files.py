@@ -3,9 +3,14 @@ API маршруты для просмотра файлов исходной д
 """
 
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import TYPE_CHECKING
+from functools import lru_cache
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 import humanize
 from flask import Flask, jsonify, request
@@ -16,6 +21,88 @@ if TYPE_CHECKING:
     from flask_socketio import SocketIO
 
 
+# Кэш листингов директорий: повторные обновления страницы в пределах TTL не ходят на NFS.
+# Запись действительна, пока не истек TTL и не изменился mtime директории
+LISTING_CACHE_TTL = 10
+LISTING_CACHE_MAX_ENTRIES = 256
+_listing_cache: Dict[Tuple[str, str], Tuple[float, int, List[Dict[str, Any]]]] = {}
+_listing_cache_lock = threading.Lock()
+
+# Максимум записей в ответе /api/files
+MAX_LISTING_ENTRIES = 500
+
+# Параллельный stat записей листинга для больших директорий
+LISTING_STAT_WORKERS = 16
+LISTING_PARALLEL_STAT_THRESHOLD = 32
+
+# Размеры файлов бэкапов в одной директории часто повторяются (цепочки инкрементов, метаданные) -
+# отформатированная строка берется из кэша без повторного вызова humanize
+_naturalsize = lru_cache(maxsize=4096)(humanize.naturalsize)
+
+
+def _get_cached_listing(cache_key: Tuple[str, str], dir_mtime_ns: int) -> Optional[List[Dict[str, Any]]]:
+    """Получение листинга из кэша, если он еще актуален"""
+    with _listing_cache_lock:
+        cached = _listing_cache.get(cache_key)
+    if cached is None:
+        return None
+
+    cached_at, cached_mtime_ns, entries = cached
+    if cached_mtime_ns != dir_mtime_ns or time.monotonic() - cached_at > LISTING_CACHE_TTL:
+        return None
+    return entries
+
+
+def _store_cached_listing(cache_key: Tuple[str, str], dir_mtime_ns: int, entries: List[Dict[str, Any]]) -> None:
+    """Сохранение листинга в кэш с вытеснением самой старой записи при переполнении"""
+    with _listing_cache_lock:
+        if cache_key not in _listing_cache and len(_listing_cache) >= LISTING_CACHE_MAX_ENTRIES:
+            oldest_key = min(_listing_cache, key=lambda key: _listing_cache[key][0])
+            del _listing_cache[oldest_key]
+        _listing_cache[cache_key] = (time.monotonic(), dir_mtime_ns, entries)
+
+
+def _list_directory_entries(target_path: Path, base_path: Path) -> List[Dict[str, Any]]:
+    """Листинг директории: сначала поддиректории, затем файлы, не более 500 записей"""
+    entries = []
+
+    # Один проход scandir: тип берется из readdir (d_type), stat - только для выводимых 500 записей.
+    # Директории и файлы собираются в отдельные списки и сортируются по готовому ключу (имя в нижнем
+    # регистре) без составного ключа на каждый элемент
+    directories = []
+    files = []
+    with os.scandir(target_path) as it:
+        for entry in it:
+            (files if entry.is_file() else directories).append((entry.name.lower(), entry))
+    directories.sort(key=itemgetter(0))
+    files.sort(key=itemgetter(0))
+
+    selected = [(False, entry) for _, entry in directories[:MAX_LISTING_ENTRIES]]
+    selected += [(True, entry) for _, entry in files[:MAX_LISTING_ENTRIES - len(selected)]]
+
+    # stat на NFS - сетевой запрос; для больших директорий выполняем их параллельно (порядок сохраняется)
+    if len(selected) > LISTING_PARALLEL_STAT_THRESHOLD:
+        with ThreadPoolExecutor(max_workers=LISTING_STAT_WORKERS) as executor:
+            stats = list(executor.map(lambda item: item[1].stat(), selected))
+    else:
+        stats = [entry.stat() for _, entry in selected]
+
+    # Относительный путь директории вычисляется один раз, для записей - только конкатенация имени
+    relative_prefix = '' if target_path == base_path else str(target_path.relative_to(base_path)) + os.sep
+
+    for (is_file, entry), stat in zip(selected, stats):
+        entries.append({
+            'name': entry.name,
+            'type': 'directory' if entry.is_dir() else 'file',
+            'size': stat.st_size if is_file else None,
+            'size_human': _naturalsize(stat.st_size) if is_file else None,
+            'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            'relative_path': relative_prefix + entry.name
+        })
+
+    return entries
+
+
 def init_routes(app: Flask) -> None:
     """Инициализация маршрутов просмотра файлов"""
 
@@ -33,22 +120,18 @@ def init_routes(app: Flask) -> None:
         if not str(target_path).startswith(str(base_path)):
             return jsonify({'status': 'error', 'message': 'Path is outside the allowed directory'}), 400
 
-        if not target_path.exists():
+        try:
+            # mtime директории меняется при добавлении/удалении записей - валидатор кэша листинга
+            dir_mtime_ns = os.stat(target_path).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
             return jsonify({'status': 'error', 'message': 'Path does not exist'}), 404
 
-        entries = []
         try:
-            for entry in sorted(target_path.iterdir(), key=lambda p: (p.is_file(), p.name.lower()))[:500]:
-                stat = entry.stat()
-                relative_path = '.' if entry == base_path else str(entry.relative_to(base_path))
-                entries.append({
-                    'name': entry.name,
-                    'type': 'directory' if entry.is_dir() else 'file',
-                    'size': stat.st_size if entry.is_file() else None,
-                    'size_human': humanize.naturalsize(stat.st_size) if entry.is_file() else None,
-                    'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                    'relative_path': relative_path
-                })
+            cache_key = (str(base_path), str(target_path))
+            entries = _get_cached_listing(cache_key, dir_mtime_ns)
+            if entries is None:
+                entries = _list_directory_entries(target_path, base_path)
+                _store_cached_listing(cache_key, dir_mtime_ns, entries)
         except PermissionError:
             return jsonify({'status': 'error', 'message': 'Permission denied'}), 403
 
@@ -2,13 +2,14 @@
 API маршруты для работы с планировщиком
 """
 
+import logging
 import threading
 import uuid
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from typing import Dict, Any, Tuple
 from datetime import datetime
 
-import humanize
+import orjson
 
 from app.services.scheduler_service import scheduler_service
 
@@ -58,26 +59,11 @@ def init_routes(app: Flask) -> None:
     def _handle_scheduler_stats() -> Tuple[Dict[str, Any], int]:
         """Обработка получения статистики планировщика"""
         try:
-            stats = {
-                'total_schedules': len(scheduler_service.schedules),
-                'enabled_schedules': len([s for s in scheduler_service.schedules.values() if s.enabled]),
-                'total_runs': len(scheduler_service.sync_history),
-                'successful_runs': len([h for h in scheduler_service.sync_history if h.status.value == 'completed']),
-                'failed_runs': len([h for h in scheduler_service.sync_history if h.status.value == 'failed']),
-                'total_files_uploaded': sum(h.files_uploaded for h in scheduler_service.sync_history if hasattr(h, 'files_uploaded')),
-                'total_data_uploaded': humanize.naturalsize(sum(h.uploaded_size for h in scheduler_service.sync_history if hasattr(h, 'uploaded_size'))),
-            }
-            
-            # Вычисляем процент успешных запусков
-            if stats['total_runs'] > 0:
-                stats['success_rate'] = (stats['successful_runs'] / stats['total_runs']) * 100
-            else:
-                stats['success_rate'] = 0
-                
+            # Статистика считается сервисом за один проход по истории
+            stats = scheduler_service.get_all_schedules_stats()
             return jsonify(stats), 200
             
         except Exception as e:
-            import logging
             logging.getLogger(__name__).error(f"Error getting scheduler stats: {e}", exc_info=True)
             return jsonify({'status': 'error', 'message': str(e)}), 500
     
@@ -85,14 +71,17 @@ def init_routes(app: Flask) -> None:
         """Обработка получения всех расписаний"""
         try:
             schedules_with_stats = {}
+            # Время следующего запуска всех расписаний - одним обращением к планировщику
+            next_runs = scheduler_service.get_next_run_times()
             for schedule_id, schedule in scheduler_service.schedules.items():
                 schedule_dict = schedule.to_dict()
+                next_run = next_runs.get(schedule_id)
+                schedule_dict['next_run'] = next_run.isoformat() if next_run else None
                 schedule_dict['stats'] = scheduler_service.get_schedule_stats(schedule_id)
                 schedules_with_stats[schedule_id] = schedule_dict
                 
             return jsonify(schedules_with_stats), 200
         except Exception as e:
-            import logging
             logging.getLogger(__name__).error(f"Error getting schedules: {e}", exc_info=True)
             return jsonify({'status': 'error', 'message': str(e)}), 500
     
@@ -206,13 +195,12 @@ def init_routes(app: Flask) -> None:
                 period=period
             )
             
-            # Конвертируем в словари
+            # Конвертируем в словари и сериализуем через orjson - история бывает длинной
             history_dicts = [h.to_dict() for h in history]
             
-            return jsonify(history_dicts), 200
+            return Response(orjson.dumps(history_dicts), mimetype='application/json'), 200
             
         except Exception as e:
-            import logging
             logging.getLogger(__name__).error(f"Error getting scheduler history: {e}", exc_info=True)
             return jsonify({'status': 'error', 'message': str(e)}), 500
     
@@ -225,7 +213,6 @@ def init_routes(app: Flask) -> None:
             logs = scheduler_service.get_debug_logs(level=level, limit=limit)
             return jsonify({'status': 'success', 'logs': logs}), 200
         except Exception as e:
-            import logging
             logging.getLogger(__name__).error(f"Error getting debug logs: {e}", exc_info=True)
             return jsonify({'status': 'error', 'message': str(e)}), 500
     